@@ -0,0 +1,140 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from report_cache import check_parquet_current
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; fall back to the pandas aggregation
+    njit = None
+
+# Customer profiles shared by the lookalike (task2) and clustering (task3)
+# scripts. The profiles are cached as Parquet next to the input files and only
+# rebuilt when one of the inputs (or this module) is newer than the cache.
+
+PROFILES_FILE = 'profiles.parquet'
+SOURCE_FILES = ['customers.parquet', 'products.parquet', 'transactions.parquet']
+
+# Below this many transactions the pandas groupby is fast enough that the
+# numba kernel is not worth its compilation cost
+NUMBA_MIN_ROWS = 1_000_000
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _aggregate_sorted(starts, cat_codes, quantity, value, n_cats):
+        # Rows are sorted by customer, so each customer owns the contiguous
+        # slice starts[c]:starts[c + 1] and can be reduced independently
+        n_customers = len(starts) - 1
+        total_quantity = np.zeros(n_customers)
+        total_value = np.zeros(n_customers)
+        counts = np.zeros((n_customers, n_cats), dtype=np.int64)
+        for c in prange(n_customers):
+            for i in range(starts[c], starts[c + 1]):
+                total_quantity[c] += quantity[i]
+                total_value[c] += value[i]
+                if cat_codes[i] >= 0:
+                    counts[c, cat_codes[i]] += 1
+        return total_quantity, total_value, counts
+
+
+def _aggregate_with_pandas(merged_data):
+    # Aggregate transactions to create customer profiles
+    customer_profiles = merged_data.groupby('CustomerID', observed=True).agg({
+        'Quantity': 'sum',  # Total quantity purchased
+        'TotalValue': 'sum',  # Total transaction value
+    })
+
+    # Count purchases per category (one 'Category_<name>' column per category)
+    category_counts = pd.crosstab(merged_data['CustomerID'], merged_data['Category'])
+    category_counts.columns = 'Category_' + category_counts.columns.astype(str)
+    return pd.concat([customer_profiles, category_counts], axis=1)
+
+
+def _aggregate_with_numba(merged_data):
+    # Encode customers and categories as integer codes and sort the
+    # transactions by customer once, so the kernel runs in a single pass
+    customers = pd.Categorical(merged_data['CustomerID'])
+    customer_codes = customers.codes.astype(np.int32)
+    order = np.argsort(customer_codes, kind='stable')
+    starts = np.searchsorted(customer_codes[order], np.arange(len(customers.categories) + 1))
+
+    # Drop categories without transactions so the columns match the crosstab
+    categories = merged_data['Category'].astype('category').cat.remove_unused_categories().cat
+    total_quantity, total_value, counts = _aggregate_sorted(
+        starts,
+        categories.codes.to_numpy(np.int32)[order],
+        merged_data['Quantity'].to_numpy(np.float64)[order],
+        merged_data['TotalValue'].to_numpy(np.float64)[order],
+        len(categories.categories),
+    )
+
+    customer_profiles = pd.DataFrame(
+        {
+            'Quantity': total_quantity.astype(merged_data['Quantity'].dtype),
+            'TotalValue': total_value,
+        },
+        index=pd.Index(customers.categories, name='CustomerID'),
+    )
+    category_counts = pd.DataFrame(
+        counts,
+        index=customer_profiles.index,
+        columns='Category_' + categories.categories.astype(str),
+    )
+    return pd.concat([customer_profiles, category_counts], axis=1)
+
+
+def _merge_transactions(transactions_df, products_df):
+    # Merge transaction and product data to get detailed transaction info
+    return transactions_df.join(products_df.set_index('ProductID'), on='ProductID', how='left', rsuffix='_p')
+
+
+def build_customer_profiles(transactions_df, products_df, customers_df):
+    """Aggregate transactions into one profile row per customer."""
+    merged_data = _merge_transactions(transactions_df, products_df)
+
+    # Aggregate transactions to create customer profiles, using the fused
+    # numba kernel for large transaction tables when numba is available
+    if njit is not None and len(merged_data) >= NUMBA_MIN_ROWS:
+        customer_profiles = _aggregate_with_numba(merged_data)
+    else:
+        customer_profiles = _aggregate_with_pandas(merged_data)
+    customer_profiles = customer_profiles.reset_index()
+
+    # Merge with customer data
+    return customer_profiles.join(customers_df.set_index('CustomerID'), on='CustomerID', how='left')
+
+
+def load_customer_profiles(data_dir='..'):
+    """Return the cached customer profiles, rebuilding them if any input or this module changed."""
+    check_parquet_current(data_dir)
+    profiles_path = os.path.join(data_dir, PROFILES_FILE)
+    source_paths = [os.path.join(data_dir, name) for name in SOURCE_FILES]
+
+    # This module is a source too: a change to how profiles are built must
+    # invalidate the cache just like a change to the input data
+    if os.path.exists(profiles_path) and os.path.getmtime(profiles_path) >= max(
+        os.path.getmtime(path) for path in source_paths + [__file__]
+    ):
+        return pd.read_parquet(profiles_path)
+
+    customers_df, products_df, transactions_df = (pd.read_parquet(path) for path in source_paths)
+    customer_profiles = build_customer_profiles(transactions_df, products_df, customers_df)
+    customer_profiles.to_parquet(profiles_path, engine='pyarrow', compression='zstd', index=False)
+    return customer_profiles
+
+
+if __name__ == '__main__':
+    # Check that the numba and pandas aggregations agree on the bundled data
+    # (which is far below NUMBA_MIN_ROWS, so the scripts never take the numba
+    # path on it). Run from the repository root after prepare_data.py.
+    if njit is None:
+        raise SystemExit("numba is not installed; only the pandas aggregation is available.")
+    products_df = pd.read_parquet('products.parquet')
+    # An extra category without products must not add a column on either path
+    products_df['Category'] = products_df['Category'].astype('category').cat.add_categories(['__unused__'])
+    transactions_df = pd.read_parquet('transactions.parquet')
+    merged_data = _merge_transactions(transactions_df, products_df)
+    pd.testing.assert_frame_equal(_aggregate_with_numba(merged_data), _aggregate_with_pandas(merged_data))
+    print("numba and pandas customer aggregations match.")
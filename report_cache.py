@@ -0,0 +1,63 @@
+import hashlib
+import os
+
+# Lets the report scripts (task1, task3) skip plotting and PDF generation when
+# their inputs are byte-for-byte identical to the last successful run, and lets
+# every script refuse to run on Parquet files that are older than the raw CSVs.
+
+SIGNATURE_FILE = os.path.join('.cache', 'sig.txt')
+
+# Raw CSVs and the Parquet files prepare_data.py generates from them
+PARQUET_FILES = {
+    'Customers.csv': 'customers.parquet',
+    'Products.csv': 'products.parquet',
+    'Transactions.csv': 'transactions.parquet',
+}
+
+
+def check_parquet_current(data_dir='..'):
+    """Raise if any raw CSV is newer than its Parquet copy (or the copy is missing)."""
+    stale = [
+        csv_name
+        for csv_name, parquet_name in PARQUET_FILES.items()
+        if not os.path.exists(os.path.join(data_dir, parquet_name))
+        or os.path.getmtime(os.path.join(data_dir, csv_name)) > os.path.getmtime(os.path.join(data_dir, parquet_name))
+    ]
+    if stale:
+        raise RuntimeError(
+            f"{', '.join(stale)} changed since the Parquet files were generated; "
+            "re-run 'python prepare_data.py' from the repository root."
+        )
+
+
+def inputs_signature(paths):
+    """Return a blake2b digest over the contents of the given files."""
+    digest = hashlib.blake2b()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def report_is_current(report_path, source_paths, signature_file=SIGNATURE_FILE):
+    """Return True if the report exists, is newer than its sources and their signature is unchanged."""
+    if not os.path.exists(report_path) or not os.path.exists(signature_file):
+        return False
+    if os.path.getmtime(report_path) < max(os.path.getmtime(path) for path in source_paths):
+        return False
+    with open(signature_file) as f:
+        return f.read().strip() == inputs_signature(source_paths)
+
+
+def save_signature(source_paths, signature_file=SIGNATURE_FILE):
+    """Record the signature of the inputs a report was just generated from."""
+    os.makedirs(os.path.dirname(signature_file), exist_ok=True)
+    with open(signature_file, 'w') as f:
+        f.write(inputs_signature(source_paths))
+
+
+def fpdf_accepts_streams():
+    """Return True if the installed fpdf can embed images from file-like objects (fpdf2)."""
+    # Imported here so the up-to-date check stays free of heavy imports
+    from fpdf import FPDF_VERSION
+    return int(FPDF_VERSION.split('.')[0]) >= 2
@@ -1,92 +1,127 @@
+import io
+import sys
+
+sys.path.append('..')
+from report_cache import check_parquet_current, fpdf_accepts_streams, report_is_current, save_signature
+
+# Refuse to run on stale Parquet files, then skip the whole run if the report
+# is already up to date with the inputs (checked before the heavy imports below,
+# so an unchanged re-run exits in milliseconds)
+check_parquet_current()
+source_files = ['../customers.parquet', '../products.parquet', '../transactions.parquet', __file__]
+if report_is_current("EDA_Report.pdf", source_files):
+    print("\nPDF report 'EDA_Report.pdf' is up to date.")
+    sys.exit(0)
+
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Render straight to files, no GUI backend needed
 import matplotlib.pyplot as plt
 import seaborn as sns
 from fpdf import FPDF
 
-# Load the datasets
-customers_df = pd.read_csv('../Customers.csv')
-products_df = pd.read_csv('../Products.csv')
-transactions_df = pd.read_csv('../Transactions.csv')
-
-# Convert date columns to datetime format for proper analysis
-customers_df['SignupDate'] = pd.to_datetime(customers_df['SignupDate'])
-transactions_df['TransactionDate'] = pd.to_datetime(transactions_df['TransactionDate'])
+# Load the datasets (typed Parquet files generated by prepare_data.py)
+customers_df = pd.read_parquet(source_files[0])
+products_df = pd.read_parquet(source_files[1])
+transactions_df = pd.read_parquet(source_files[2])
 
 # ===== DATA CLEANING =====
-# Drop rows with missing values to ensure data consistency
-customers_df.dropna(inplace=True)
-products_df.dropna(inplace=True)
-transactions_df.dropna(inplace=True)
+# Drop rows with missing values and duplicate rows in one pass per frame,
+# skipping the work entirely when a frame is already clean
+def clean(df):
+    mask = df.notna().all(axis=1) & ~df.duplicated()
+    return df if mask.all() else df[mask].reset_index(drop=True)
 
-# Remove duplicate rows to avoid redundant records
-customers_df.drop_duplicates(inplace=True)
-products_df.drop_duplicates(inplace=True)
-transactions_df.drop_duplicates(inplace=True)
+customers_df = clean(customers_df)
+products_df = clean(products_df)
+transactions_df = clean(transactions_df)
 
 # ===== EXPLORATORY DATA ANALYSIS =====
 # Set the visualization style for consistent plots
 sns.set(style="whitegrid")
 
+# Reuse a single figure for every plot, clearing and resizing it in between
+fig, ax = plt.subplots(figsize=(12, 6))
+
+def start_plot(width, height):
+    ax.clear()
+    # ax.clear() keeps tick_params, so undo any label rotation from the previous plot
+    ax.tick_params(axis='x', labelrotation=0)
+    fig.set_size_inches(width, height)
+
+# Keep each rendered PNG in memory so the PDF embeds the same bytes without
+# reading the file back from disk (fpdf2 only; PyFPDF 1.x needs a file path)
+plot_images = {}
+
+def save_plot(plot_path):
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    with open(plot_path, 'wb') as f:
+        f.write(buf.getvalue())
+    buf.seek(0)
+    plot_images[plot_path] = buf
+
 # 1. Analyze the distribution of customers by region
 region_distribution = customers_df['Region'].value_counts()
 most_common_region = region_distribution.idxmax()  # Find the region with the most customers
-plt.figure(figsize=(8, 5))
-sns.countplot(x='Region', data=customers_df, palette="viridis")
-plt.title("Customer Distribution by Region", fontsize=14)
-plt.xlabel("Region", fontsize=12)
-plt.ylabel("Number of Customers", fontsize=12)
-plt.xticks(rotation=45)
-plt.savefig("customer_distribution.png")  # Save the plot
-plt.close()
+start_plot(8, 5)
+sns.countplot(x='Region', data=customers_df, palette="viridis", ax=ax)
+ax.set_title("Customer Distribution by Region", fontsize=14)
+ax.set_xlabel("Region", fontsize=12)
+ax.set_ylabel("Number of Customers", fontsize=12)
+ax.tick_params(axis='x', labelrotation=45)
+save_plot("customer_distribution.png")  # Save the plot
 
 # 2. Analyze signup trends over time
-customers_df['SignupYearMonth'] = customers_df['SignupDate'].dt.to_period('M')  # Extract year-month for trend analysis
-signup_trends = customers_df['SignupYearMonth'].value_counts().sort_index()
-plt.figure(figsize=(12, 6))
-signup_trends.plot(kind="line", marker='o', color="teal")
-plt.title("Customer Signup Trends Over Time", fontsize=14)
-plt.xlabel("Year-Month", fontsize=12)
-plt.ylabel("Number of Signups", fontsize=12)
-plt.grid(True)
-plt.savefig("signup_trends.png")  # Save the plot
-plt.close()
+customers_df['SignupYearMonth'] = customers_df['SignupDate'].values.astype('datetime64[M]')  # Extract year-month for trend analysis
+signup_trends = customers_df.groupby('SignupYearMonth', observed=True).size()
+start_plot(12, 6)
+signup_trends.plot(kind="line", marker='o', color="teal", ax=ax)
+ax.set_title("Customer Signup Trends Over Time", fontsize=14)
+ax.set_xlabel("Year-Month", fontsize=12)
+ax.set_ylabel("Number of Signups", fontsize=12)
+ax.grid(True)
+save_plot("signup_trends.png")  # Save the plot
+
+# Merge transactions and products data to include category information,
+# and extract the transaction month once for the monthly trend analysis
+merged_data = transactions_df.join(products_df.set_index('ProductID'), on='ProductID', how='left', rsuffix='_p')
+merged_data['Month'] = merged_data['TransactionDate'].values.astype('datetime64[M]')
+
+# Aggregate sales by category, quantity by product and transactions by month
+category_sales = merged_data.groupby('Category', observed=True)['TotalValue'].sum().sort_values(ascending=False)
+product_purchases = merged_data.groupby('ProductName', observed=True)['Quantity'].sum().sort_values(ascending=False)
+transactions_monthly = merged_data.groupby('Month', observed=True).size()
 
 # 3. Analyze top-performing product categories by total sales
-# Merge transactions and products data to include category information
-merged_data = transactions_df.merge(products_df, on='ProductID', how='left')
-category_sales = merged_data.groupby('Category')['TotalValue'].sum().sort_values(ascending=False)
 top_category = category_sales.idxmax()  # Identify the category with the highest sales
-plt.figure(figsize=(10, 6))
-sns.barplot(x=category_sales.index, y=category_sales.values, palette="magma")
-plt.title("Top-Performing Product Categories by Sales", fontsize=14)
-plt.xlabel("Category", fontsize=12)
-plt.ylabel("Total Sales (USD)", fontsize=12)
-plt.xticks(rotation=45)
-plt.savefig("top_categories.png")  # Save the plot
-plt.close()
+start_plot(10, 6)
+sns.barplot(x=category_sales.index, y=category_sales.values, order=category_sales.index, palette="magma", ax=ax)
+ax.set_title("Top-Performing Product Categories by Sales", fontsize=14)
+ax.set_xlabel("Category", fontsize=12)
+ax.set_ylabel("Total Sales (USD)", fontsize=12)
+ax.tick_params(axis='x', labelrotation=45)
+save_plot("top_categories.png")  # Save the plot
 
 # 4. Identify the most purchased products by total quantity sold
-product_purchases = merged_data.groupby('ProductName')['Quantity'].sum().sort_values(ascending=False)
 top_product = product_purchases.idxmax()  # Find the most purchased product
-plt.figure(figsize=(10, 6))
-sns.barplot(x=product_purchases.values[:10], y=product_purchases.index[:10], palette="coolwarm")
-plt.title("Top 10 Most Purchased Products", fontsize=14)
-plt.xlabel("Total Quantity Sold", fontsize=12)
-plt.ylabel("Product Name", fontsize=12)
-plt.savefig("top_products.png")  # Save the plot
-plt.close()
+start_plot(10, 6)
+sns.barplot(x=product_purchases.values[:10], y=product_purchases.index[:10], palette="coolwarm", ax=ax)
+ax.set_title("Top 10 Most Purchased Products", fontsize=14)
+ax.set_xlabel("Total Quantity Sold", fontsize=12)
+ax.set_ylabel("Product Name", fontsize=12)
+save_plot("top_products.png")  # Save the plot
 
 # 5. Analyze monthly transaction trends
-transactions_monthly = transactions_df['TransactionDate'].dt.to_period('M').value_counts().sort_index()
 peak_month = transactions_monthly.idxmax()  # Identify the month with the highest transaction count
-plt.figure(figsize=(12, 6))
-transactions_monthly.plot(kind="line", marker='o', color="purple")
-plt.title("Monthly Transaction Trends", fontsize=14)
-plt.xlabel("Month", fontsize=12)
-plt.ylabel("Number of Transactions", fontsize=12)
-plt.grid(True)
-plt.savefig("monthly_transactions.png")  # Save the plot
-plt.close()
+start_plot(12, 6)
+transactions_monthly.plot(kind="line", marker='o', color="purple", ax=ax)
+ax.set_title("Monthly Transaction Trends", fontsize=14)
+ax.set_xlabel("Month", fontsize=12)
+ax.set_ylabel("Number of Transactions", fontsize=12)
+ax.grid(True)
+save_plot("monthly_transactions.png")  # Save the plot
+plt.close(fig)
 
 # ===== PDF REPORT CREATION =====
 # Define a PDF class with custom headers and footers
@@ -129,7 +164,7 @@ detailed_insights.append(
 # Signup trends insights
 peak_signup_month = signup_trends.idxmax()
 detailed_insights.append(
-    f"2. Signup Trends: The peak signup month was {peak_signup_month}, with {signup_trends[peak_signup_month]} customers signing up."
+    f"2. Signup Trends: The peak signup month was {peak_signup_month:%Y-%m}, with {signup_trends[peak_signup_month]} customers signing up."
 )
 
 # Product category performance insights
@@ -146,7 +181,7 @@ detailed_insights.append(
 # Monthly transactions insights
 peak_month = transactions_monthly.idxmax()
 detailed_insights.append(
-    f"5. Monthly Transactions: The highest transaction volume occurred in {peak_month}."
+    f"5. Monthly Transactions: The highest transaction volume occurred in {peak_month:%Y-%m}."
 )
 
 # Write insights into the PDF
@@ -172,8 +207,9 @@ plots = [
 for plot_path, title in plots:
     pdf.ln(10)
     pdf.cell(0, 10, title, ln=1)
-    pdf.image(plot_path, x=10, y=None, w=180)
+    pdf.image(plot_images[plot_path] if fpdf_accepts_streams() else plot_path, x=10, y=None, w=180)
 
 # Save the PDF report
 pdf.output("EDA_Report.pdf")
+save_signature(source_files)
 print("\nPDF report 'EDA_Report.pdf' has been generated.")
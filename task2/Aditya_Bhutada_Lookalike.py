@@ -1,87 +1,71 @@
+import sys
+
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, normalize
 from sklearn.compose import ColumnTransformer
 
-# Load datasets
-customers_df = pd.read_csv('../Customers.csv')
-products_df = pd.read_csv('../Products.csv')
-transactions_df = pd.read_csv('../Transactions.csv')
-
-# Convert dates to datetime format
-customers_df['SignupDate'] = pd.to_datetime(customers_df['SignupDate'])
-transactions_df['TransactionDate'] = pd.to_datetime(transactions_df['TransactionDate'])
-
-# Merge transaction and product data to get detailed transaction info
-merged_data = transactions_df.merge(products_df, on='ProductID', how='left')
+# Load customer profiles (cached by features.py, rebuilt when the inputs change)
+sys.path.append('..')
+from features import load_customer_profiles
 
-# Aggregate transactions to create customer profiles
-customer_profiles = (
-    merged_data.groupby('CustomerID')
-    .agg({
-        'Quantity': 'sum',  # Total quantity purchased
-        'TotalValue': 'sum',  # Total transaction value
-        'Category': lambda x: ','.join(x),  # Concatenate purchased categories
-    })
-    .reset_index()
-)
-
-# Merge with customer data
-customer_profiles = customer_profiles.merge(customers_df, on='CustomerID', how='left')
+customer_profiles = load_customer_profiles()
 
-# Handle numerical and categorical features
-numerical_features = ['Quantity', 'TotalValue']
-categorical_features = ['Region', 'Category']
+# Handle numerical and categorical features (per-category purchase counts are
+# scaled alongside the totals)
+category_features = [col for col in customer_profiles.columns if col.startswith('Category_')]
+numerical_features = ['Quantity', 'TotalValue'] + category_features
+categorical_features = ['Region']
 
 # Apply preprocessing: scale numerical features, one-hot encode categorical features
+# (without centering, so the combined output can stay a sparse CSR matrix)
 preprocessor = ColumnTransformer(
     transformers=[
-        ('num', StandardScaler(), numerical_features),
-        ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features),
-    ]
+        ('num', StandardScaler(with_mean=False), numerical_features),
+        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=True, dtype=np.float32), categorical_features),
+    ],
+    sparse_threshold=1.0,
 )
 
 # Transform the data
 X = preprocessor.fit_transform(customer_profiles)
 
-# Calculate cosine similarity
-similarity_matrix = cosine_similarity(X)
-
-# Get top 3 similar customers for each of the first 20 customers
-def get_top_lookalikes(customer_id, similarity_matrix, customer_profiles, top_n=3):
-    customer_index = customer_profiles.index[customer_profiles['CustomerID'] == customer_id].tolist()[0]
-    customer_similarities = similarity_matrix[customer_index]
-    
-    # Exclude self-similarity
-    customer_similarities[customer_index] = -1
-    
-    # Get top N most similar customers
-    top_indices = np.argsort(customer_similarities)[-top_n:][::-1]
-    top_customers = customer_profiles.iloc[top_indices]['CustomerID']
-    top_scores = customer_similarities[top_indices]
-    
-    return list(zip(top_customers, top_scores))
+# L2-normalize the sparse rows once in float32, so cosine similarity against
+# the target customers is a single sparse matrix product
+X = normalize(X.tocsr().astype(np.float32), norm='l2')
+top_n = 3
 
 # Filter customers to include only the first 20 (CustomerID: C0001 to C0020)
-top_20_customers = customers_df[customers_df['CustomerID'].isin([f'C{i:04d}' for i in range(1, 21)])]
+target_ids = [f'C{i:04d}' for i in range(1, 21)]
+query_idx = np.flatnonzero(customer_profiles['CustomerID'].isin(target_ids))
 
-# Generate lookalike recommendations for customers C0001 - C0020
-lookalikes = {}
-for customer_id in top_20_customers['CustomerID']:
-    lookalikes[customer_id] = get_top_lookalikes(customer_id, similarity_matrix, customer_profiles)
+# Exclude self-similarity by masking each customer's own column
+similarities = (X[query_idx] @ X.T).toarray()
+similarities[np.arange(len(query_idx)), query_idx] = -np.inf
 
-# Create Lookalike.csv in the required format
-lookalike_map = []
-for cust_id, similar_customers in lookalikes.items():
-    similar_customers_list = [f"({sim_cust_id}, {round(score, 4)})" for sim_cust_id, score in similar_customers]
-    similar_customers_str = f"[{', '.join(similar_customers_list)}]"
-    lookalike_map.append({
-        'CustomerID': cust_id,
-        'SimilarCustomers': similar_customers_str,
-    })
+# Get top 3 similar customers for each of the first 20 customers
+idxs = np.argpartition(-similarities, kth=top_n - 1, axis=1)[:, :top_n]
+scores = np.take_along_axis(similarities, idxs, axis=1)
+order = np.argsort(-scores, axis=1)
+idxs = np.take_along_axis(idxs, order, axis=1)
+scores = np.take_along_axis(scores, order, axis=1)
 
-lookalike_df = pd.DataFrame(lookalike_map)
+# Generate lookalike recommendations for customers C0001 - C0020 as one
+# long-form frame (one row per target/similar-customer pair)
+customer_ids = customer_profiles['CustomerID'].to_numpy()
+lookalike_pairs = pd.DataFrame({
+    'CustomerID': customer_ids[query_idx].repeat(top_n),
+    'SimCustomerID': customer_ids[idxs.ravel()],
+    'Score': scores.ravel().astype(np.float64),  # Round in float64 so no float32 noise reaches the CSV
+})
+
+# Create Lookalike.csv in the required format
+lookalike_pairs['Pair'] = '(' + lookalike_pairs['SimCustomerID'].astype(str) + ', ' + lookalike_pairs['Score'].round(4).astype(str) + ')'
+lookalike_df = (
+    lookalike_pairs.groupby('CustomerID', observed=True, sort=False)['Pair']
+    .agg(lambda pairs: '[' + ', '.join(pairs) + ']')
+    .reset_index(name='SimilarCustomers')
+)
 lookalike_df.to_csv('Lookalike.csv', index=False)
 
 print("Lookalike.csv has been generated successfully!")
@@ -1,41 +1,56 @@
-import pandas as pd
-from sklearn.cluster import KMeans
+import io
+import sys
+
+sys.path.append('..')
+from report_cache import check_parquet_current, fpdf_accepts_streams, report_is_current, save_signature
+
+# Refuse to run on stale Parquet files, then skip the whole run if the report
+# is already up to date with the inputs (checked before the heavy imports below,
+# so an unchanged re-run exits in milliseconds)
+check_parquet_current()
+source_files = [
+    '../customers.parquet',
+    '../products.parquet',
+    '../transactions.parquet',
+    '../features.py',
+    __file__,
+]
+if report_is_current("customer_segmentation_report.pdf", source_files):
+    print("PDF report is up to date.")
+    sys.exit(0)
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import davies_bouldin_score, silhouette_score
 import matplotlib.pyplot as plt
 import seaborn as sns
 from fpdf import FPDF
 
-# Load datasets
-customers_df = pd.read_csv('../Customers.csv')
-transactions_df = pd.read_csv('../Transactions.csv')
-
-# Merge customer data with transaction data
-merged_data = transactions_df.merge(customers_df, on='CustomerID', how='left')
-
-# Aggregate transaction data to create customer profiles (sum of quantities and total value)
-customer_profiles = (
-    merged_data.groupby('CustomerID')
-    .agg({
-        'Quantity': 'sum',
-        'TotalValue': 'sum',
-    })
-    .reset_index()
-)
+from features import load_customer_profiles
+
+# Load customer profiles (sum of quantities and total value per customer,
+# cached by features.py and rebuilt when the inputs change)
+customer_profiles = load_customer_profiles()
 
 # Normalize numerical features
 scaler = StandardScaler()
-scaled_data = scaler.fit_transform(customer_profiles[['Quantity', 'TotalValue']])
+scaled_data = scaler.fit_transform(customer_profiles[['Quantity', 'TotalValue']]).astype(np.float32)
 
-# Apply KMeans clustering
-kmeans = KMeans(n_clusters=4, random_state=42)  # You can choose between 2 and 10 clusters
+# Apply KMeans clustering (mini-batch updates instead of full-batch Lloyd iterations)
+kmeans = MiniBatchKMeans(n_clusters=4, batch_size=1024, n_init=3, random_state=42)  # You can choose between 2 and 10 clusters
 customer_profiles['Cluster'] = kmeans.fit_predict(scaled_data)
 
 # Calculate DB Index
 db_index = davies_bouldin_score(scaled_data, customer_profiles['Cluster'])
 
-# Calculate Silhouette Score
-silhouette_avg = silhouette_score(scaled_data, customer_profiles['Cluster'])
+# Calculate Silhouette Score (on a fixed random sample of at most 1000 customers)
+silhouette_avg = silhouette_score(
+    scaled_data,
+    customer_profiles['Cluster'],
+    sample_size=min(1000, len(scaled_data)),
+    random_state=42,
+)
 
 # Calculate Inertia (sum of squared distances of samples to their cluster center)
 inertia = kmeans.inertia_
@@ -48,9 +63,14 @@ plt.xlabel('Total Quantity Purchased')
 plt.ylabel('Total Value of Transactions')
 plt.legend(title='Cluster')
 
-# Save the plot as an image file for embedding into the PDF
-plt.savefig('customer_clusters.png', bbox_inches='tight')
+# Save the plot as an image file, keeping the PNG bytes in memory for embedding into the PDF
+# (fpdf2 only; PyFPDF 1.x needs a file path)
+plot_image = io.BytesIO()
+plt.savefig(plot_image, format='png', bbox_inches='tight')
 plt.close()
+with open('customer_clusters.png', 'wb') as f:
+    f.write(plot_image.getvalue())
+plot_image.seek(0)
 
 # Generate PDF report
 pdf = FPDF()
@@ -73,9 +93,10 @@ pdf.multi_cell(0, 10, txt=f"Inertia (Within-cluster sum of squares): {inertia:.4
 pdf.ln(10)  # Line break
 pdf.cell(200, 10, txt="Cluster Visualization:", ln=True)
 pdf.ln(5)  # Line break
-pdf.image('customer_clusters.png', x=10, y=pdf.get_y(), w=180)
+pdf.image(plot_image if fpdf_accepts_streams() else 'customer_clusters.png', x=10, y=pdf.get_y(), w=180)
 
 # Save the PDF file
 pdf.output("customer_segmentation_report.pdf")
+save_signature(source_files)
 
 print("PDF report generated successfully!")